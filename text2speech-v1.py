@@ -3,13 +3,152 @@ TTS 批量处理脚本
 功能：读取 input.txt 文件，根据配置选择逐行生成语音文件或整文本生成一个语音文件，并生成处理报告
 """
 
+import importlib.util
 import os
+import queue
 import re
+import struct
 import time
 import wave
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from indextts.infer_v2 import IndexTTS2
 
+# 当前脚本所在目录（模块导入时解析一次，供所有实例复用）
+_HERE = Path(__file__).resolve().parent
+
+# 文件名非法字符删除表（str.translate 在 C 层完成，无需正则引擎）
+_INVALID_FILENAME_TRANS = str.maketrans('', '', '<>:"/\\|?*')
+
+# 支持的推理精度
+SUPPORTED_PRECISIONS = ("fp32", "fp16", "int8")
+
+# 支持的字符计数方式：codepoints 统计全部字符，non_punct 不计标点和空白
+SUPPORTED_COUNT_MODES = ("codepoints", "non_punct")
+
+# 标点和空白匹配规则（non_punct 计数模式使用）
+_PUNCT_RE = re.compile(r'[，。、！？；：“”‘’（）《》…—,.!?;:"\'()\s]+')
+
+
+def quantize_model_int8(tts):
+    """
+    对 GPT 主干各层的注意力和前馈线性层做动态 INT8 量化，其余模块（声码器、s2mel 等）保持原精度
+    
+    注意: PyTorch 动态量化算子仅支持 CPU
+    
+    参数:
+        tts: IndexTTS2 实例
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+    
+    blocks = tts.gpt.gpt.h
+    for block in blocks:
+        for parent in (block.attn, block.mlp):
+            for name, child in list(parent.named_children()):
+                if not isinstance(child, Conv1D):
+                    continue
+                # GPT2 的 Conv1D 等价于权重转置的 Linear，先转换才能被动态量化
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features, device=child.weight.device, dtype=child.weight.dtype)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, name, linear)
+    torch.ao.quantization.quantize_dynamic(blocks, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_tts_model(config_path, model_dir, use_fp16, use_cuda_kernel, use_deepspeed, use_accel, precision, device=None):
+    """
+    加载 IndexTTS2 模型，flash_attn 不可用时关闭 GPT2 加速引擎，precision 为 "int8" 时量化 GPT 主干
+    
+    参数:
+        config_path: TTS 模型配置文件路径
+        model_dir: TTS 模型目录
+        use_fp16: 是否使用 FP16 精度
+        use_cuda_kernel: 是否使用 CUDA 内核
+        use_deepspeed: 是否使用 DeepSpeed（加载失败时 IndexTTS2 会自行回退）
+        use_accel: 是否使用 GPT2 加速引擎
+        precision: 推理精度，None 表示由 use_fp16 决定
+        device: 推理设备（如 'cuda:1'），None 表示由 IndexTTS2 自动选择
+        
+    返回:
+        IndexTTS2 实例和加载过程中需要写入日志的消息列表
+    """
+    messages = []
+    
+    # 加速引擎依赖 flash_attn，缺失时 IndexTTS2 会在加载完大部分权重后才报错，因此提前检查
+    if use_accel and importlib.util.find_spec("flash_attn") is None:
+        use_accel = False
+        messages.append("警告: 未安装 flash_attn，已关闭 GPT2 加速引擎")
+    
+    tts = IndexTTS2(
+        cfg_path=config_path, 
+        model_dir=model_dir, 
+        use_fp16=use_fp16, 
+        use_cuda_kernel=use_cuda_kernel, 
+        use_deepspeed=use_deepspeed,
+        use_accel=use_accel,
+        device=device
+    )
+    
+    if precision == "int8":
+        if tts.device == "cpu":
+            quantize_model_int8(tts)
+            messages.append("GPT 主干已应用动态 INT8 量化")
+        else:
+            messages.append(f"警告: 动态 INT8 量化仅支持 CPU，当前设备 {tts.device} 回退为 FP16 推理")
+    
+    return tts, messages
+
+
+def _parallel_tts_worker(rank, num_workers, gpu_count, model_kwargs, spk_audio_prompt, task_queues, result_queue):
+    """
+    多进程推理的工作进程入口：每个进程绑定一块 GPU（或一部分 CPU 线程）并加载自己的模型，
+    加载完成后向主进程报告就绪，再逐条处理主进程派发的任务，收到 None 时退出
+    
+    参数:
+        rank: 工作进程编号
+        num_workers: 工作进程总数
+        gpu_count: 可用 GPU 数量，为 0 时使用 CPU 推理
+        model_kwargs: 传给 load_tts_model 的参数
+        spk_audio_prompt: 说话人音频提示文件路径
+        task_queues: 各工作进程的任务队列，任务为 (行号, 文本, 输出路径)
+        result_queue: 向主进程回传 ('ready', 编号, 加载消息) 或 ('done', 编号, 行号, 处理时间) 的队列
+    """
+    import torch
+    
+    device = None
+    if gpu_count > 0:
+        # 显式指定设备，不依赖 CUDA_VISIBLE_DEVICES（spawn 子进程导入模块时 CUDA 可能已初始化）；
+        # 同时设为当前设备，使 .cuda() 和 DeepSpeed 也落在该 GPU 上
+        device = f"cuda:{rank}"
+        torch.cuda.set_device(device)
+    else:
+        # CPU 推理时平分线程，避免多个进程互相抢占
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // num_workers))
+    
+    tts, messages = load_tts_model(device=device, **model_kwargs)
+    # 未指定情感参考音频时，infer 也用说话人音频计算情感条件特征，两份缓存都需预热
+    tts.prepare_spk_cond(spk_audio_prompt)
+    tts.prepare_emo_cond(spk_audio_prompt)
+    result_queue.put(('ready', rank, messages))
+    
+    task_queue = task_queues[rank]
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        line_num, text, output_path = task
+        start_time = time.time()
+        tts.infer(
+            spk_audio_prompt=spk_audio_prompt,
+            text=text,
+            output_path=output_path,
+            verbose=True
+        )
+        result_queue.put(('done', rank, line_num, time.time() - start_time))
+
 
 class TTSBatchProcessor:
     """TTS 批量处理器类"""
@@ -20,8 +159,12 @@ class TTSBatchProcessor:
                  use_fp16=True, 
                  use_cuda_kernel=False, 
                  use_deepspeed=False,
+                 use_accel=False,
                  start_line_num=1,
-                 read_by_line=True):
+                 read_by_line=True,
+                 precision=None,
+                 num_workers=1,
+                 count_mode="codepoints"):
         """
         初始化 TTS 批量处理器
         
@@ -32,45 +175,85 @@ class TTSBatchProcessor:
             use_fp16: 是否使用 FP16 精度
             use_cuda_kernel: 是否使用 CUDA 内核
             use_deepspeed: 是否使用 DeepSpeed
+            use_accel: 是否使用 GPT2 加速引擎（CUDA Graph 捕获解码步骤，需要安装 flash_attn）
             start_line_num: 输出文件的起始编号，默认为1
             read_by_line: 是否按行读取，True为逐行生成音频文件，False为整文本生成一个音频文件
+            precision: 推理精度，可选 "fp32" / "fp16" / "int8"，指定时覆盖 use_fp16；
+                       "int8" 仅在 CPU 上量化 GPT 主干，GPU 上回退为 FP16
+            num_workers: 按行模式下的并行工作进程数，默认为1；大于1时每个进程各自加载模型，
+                         有 GPU 时每个进程绑定一块 GPU，进程数不超过 GPU 数
+            count_mode: 字符计数方式，"codepoints" 统计全部字符（包括标点符号），
+                        "non_punct" 不计标点和空白，使报告中的字符比率不受标点密度影响
         """
-        # 初始化 TTS 模型
-        self.tts = IndexTTS2(
-            cfg_path=config_path, 
-            model_dir=model_dir, 
-            use_fp16=use_fp16, 
-            use_cuda_kernel=use_cuda_kernel, 
-            use_deepspeed=use_deepspeed
+        if precision is not None:
+            if precision not in SUPPORTED_PRECISIONS:
+                raise ValueError(f"不支持的推理精度: {precision}，可选: {', '.join(SUPPORTED_PRECISIONS)}")
+            use_fp16 = precision in ("fp16", "int8")
+        if count_mode not in SUPPORTED_COUNT_MODES:
+            raise ValueError(f"不支持的字符计数方式: {count_mode}，可选: {', '.join(SUPPORTED_COUNT_MODES)}")
+        self.count_mode = count_mode
+        
+        self.read_by_line = read_by_line
+        self.num_workers = max(1, num_workers)
+        
+        # 模型加载参数，多进程模式下传给各工作进程
+        self._model_kwargs = dict(
+            config_path=config_path,
+            model_dir=model_dir,
+            use_fp16=use_fp16,
+            use_cuda_kernel=use_cuda_kernel,
+            use_deepspeed=use_deepspeed,
+            use_accel=use_accel,
+            precision=precision
         )
         
         # 说话人音频提示文件路径
         self.spk_audio_prompt = spk_audio_prompt
         
+        if self.read_by_line and self.num_workers > 1:
+            # 多进程模式：模型由各工作进程自行加载，主进程只负责调度和汇总
+            self.tts = None
+            load_messages = []
+        else:
+            # 初始化 TTS 模型，加载过程中的消息待日志文件打开后写入
+            self.tts, load_messages = load_tts_model(**self._model_kwargs)
+            # 预先计算并缓存说话人和情感条件特征（未指定情感参考音频时 infer 也使用说话人音频），
+            # 后续每次 infer 直接复用，首行处理时间不再包含参考音频解码和编码
+            self.tts.prepare_spk_cond(self.spk_audio_prompt)
+            self.tts.prepare_emo_cond(self.spk_audio_prompt)
+        
         # 获取当前脚本所在目录
-        self.current_dir = os.path.dirname(os.path.abspath(__file__))
+        # 对外属性保持 str 类型，兼容按字符串拼接路径的调用方
+        self.current_dir = str(_HERE)
         
         # 设置输入输出路径
-        self.input_file = os.path.join(self.current_dir, "input.txt")
-        self.output_dir = os.path.join(self.current_dir, "outputs")
+        self.input_file = str(_HERE / "input.txt")
+        self.output_dir = str(_HERE / "outputs")
         
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
         
         # 创建日志目录和日志文件路径
-        self.log_dir = os.path.join(self.current_dir, "logs")
+        self.log_dir = str(_HERE / "logs")
         os.makedirs(self.log_dir, exist_ok=True)
-        self.log_file = os.path.join(
-            self.log_dir, 
-            f"tts_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        )
+        self.log_file = str(_HERE / "logs" / f"tts_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        # 日志文件句柄只打开一次并复用，避免每行日志都重新打开/关闭文件
+        self.log_fh = open(self.log_file, 'a', encoding='utf-8', buffering=65536)
+        for message in load_messages:
+            self.log_print(message)
         
         # 初始化处理统计变量
         self.total_char_count = 0
         self.processing_records = []
         self.total_start_time = None
+        # 本次批处理开始时的时间戳，整文本模式下用于输出文件名
+        self._batch_ts = None
         self.start_line_num = start_line_num
-        self.read_by_line = read_by_line
+        
+        # 音频时长探测放到后台线程执行，使下一行的 TTS 推理可以立即开始
+        self._probe_pool = ThreadPoolExecutor(max_workers=2)
+        # 尚未完成时长探测的 (处理记录, 输出路径, future) 列表
+        self._pending_probes = []
         
     def log_print(self, message, end='\n'):
         """
@@ -81,8 +264,46 @@ class TTSBatchProcessor:
             end: 行结束符，默认为换行符
         """
         print(message, end=end)
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(message + end if end == '\n' else message)
+        self.log_fh.write(message + end if end == '\n' else message)
+    
+    def flush_log(self):
+        """将缓冲区中的日志写入日志文件"""
+        if self.log_fh is not None and not self.log_fh.closed:
+            self.log_fh.flush()
+    
+    def close(self):
+        """关闭日志文件句柄并释放时长探测线程池"""
+        probe_pool = getattr(self, '_probe_pool', None)
+        if probe_pool is not None:
+            probe_pool.shutdown(wait=True)
+        log_fh = getattr(self, 'log_fh', None)
+        if log_fh is not None and not log_fh.closed:
+            log_fh.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def __del__(self):
+        # 兜底：未通过 with 使用时，对象销毁时关闭日志文件
+        self.close()
+    
+    def count_chars(self, text):
+        """
+        按 count_mode 统计文本的字符数量
+        
+        参数:
+            text: 文本内容
+            
+        返回:
+            字符数量
+        """
+        if self.count_mode == "non_punct":
+            return len(_PUNCT_RE.sub('', text))
+        return len(text)
     
     @staticmethod
     def sanitize_filename(text):
@@ -95,8 +316,8 @@ class TTSBatchProcessor:
         返回:
             清理后的文本
         """
-        # 移除或替换文件名中的非法字符
-        text = re.sub(r'[<>:"/\\|?*]', '', text)
+        # 移除文件名中的非法字符
+        text = text.translate(_INVALID_FILENAME_TRANS)
         # 移除首尾空格
         text = text.strip()
         return text
@@ -111,15 +332,56 @@ class TTSBatchProcessor:
         返回:
             音频时长（秒），如果读取失败则返回 0.0
         """
+        duration, error = self.probe_audio_duration(audio_path)
+        if error is not None:
+            self.log_print(f"警告: 无法读取音频文件 {audio_path} 的时长: {error}")
+        return duration
+    
+    @staticmethod
+    def probe_audio_duration(audio_path):
+        """
+        读取 WAV 音频文件的时长，不输出日志，可在后台线程中调用
+        
+        参数:
+            audio_path: 音频文件路径
+            
+        返回:
+            (音频时长（秒）, 异常)，读取成功时异常为 None，失败时时长为 0.0
+        """
+        try:
+            # 只读取各块的块头：跳过 LIST 等附加块，从 fmt 块取字节率，从 data 块取数据长度
+            with open(audio_path, 'rb') as f:
+                riff_header = f.read(12)
+                if riff_header[0:4] == b'RIFF' and riff_header[8:12] == b'WAVE':
+                    byte_rate = 0
+                    while True:
+                        chunk_header = f.read(8)
+                        if len(chunk_header) < 8:
+                            break
+                        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                        if chunk_id == b'data':
+                            if byte_rate > 0:
+                                return chunk_size / float(byte_rate), None
+                            break
+                        if chunk_id == b'fmt ':
+                            _, _, _, byte_rate = struct.unpack('<HHII', f.read(12))
+                            chunk_size -= 12
+                        # 块数据按偶数字节对齐
+                        f.seek(chunk_size + (chunk_size & 1), 1)
+        except struct.error:
+            pass
+        except Exception as e:
+            return 0.0, e
+        
+        # 未找到 fmt/data 块等非常规文件时回退到 wave 模块完整解析
         try:
             with wave.open(audio_path, 'r') as wav_file:
                 frames = wav_file.getnframes()
                 sample_rate = wav_file.getframerate()
                 duration = frames / float(sample_rate)
-                return duration
+                return duration, None
         except Exception as e:
-            self.log_print(f"警告: 无法读取音频文件 {audio_path} 的时长: {e}")
-            return 0.0
+            return 0.0, e
     
     def generate_output_filename(self, line_num, text, is_full_text=False):
         """
@@ -140,7 +402,8 @@ class TTSBatchProcessor:
         
         if is_full_text:
             # 整文本模式：使用时间戳 + 文本前缀
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            # 复用批处理开始时记录的时间戳，未经 process_batch 调用时才现取
+            timestamp = self._batch_ts or datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f"full_text_{timestamp}_{safe_prefix}.wav"
         else:
             # 按行模式：行号 + 前10个字符
@@ -160,11 +423,27 @@ class TTSBatchProcessor:
         返回:
             处理记录字典，包含行号、字符数、处理时间、音频时长等信息
         """
+        record, output_path = self._synthesize_line(line_num, text)
+        # 获取生成的音频文件时长
+        record['audio_duration'] = self.get_audio_duration(output_path)
+        return record
+    
+    def _synthesize_line(self, line_num, text):
+        """
+        为单行文本生成音频文件，不探测音频时长
+        
+        参数:
+            line_num: 行号
+            text: 文本内容
+            
+        返回:
+            (处理记录字典, 输出文件路径)，记录中的音频时长为 0.0，由调用方填写
+        """
         # 生成输出文件名
         output_filename, output_path = self.generate_output_filename(line_num, text, is_full_text=False)
         
-        # 统计当前行的字符数量（包括标点符号）
-        char_count = len(text)
+        # 统计当前行的字符数量
+        char_count = self.count_chars(text)
         # 累计总字符数
         self.total_char_count += char_count
         
@@ -187,21 +466,142 @@ class TTSBatchProcessor:
         line_end_time = time.time()
         line_elapsed = line_end_time - line_start_time
         
-        # 获取生成的音频文件时长
-        audio_duration = self.get_audio_duration(output_path)
-        
-        # 构建处理记录
+        # 构建处理记录，音频时长由调用方填写
         record = {
             'line_num': line_num,
             'char_count': char_count,
             'elapsed_time': line_elapsed,
-            'audio_duration': audio_duration
+            'audio_duration': 0.0
         }
         
         # 输出完成信息
         self.log_print(f"已完成: {output_filename} 处理时间: {line_elapsed:.2f} 秒\n")
         
-        return record
+        return record, output_path
+    
+    def wait_pending_probes(self):
+        """
+        等待所有后台音频时长探测任务完成，并将结果回填到对应的处理记录中；
+        探测失败的警告在主线程中统一输出，避免与其他日志交错
+        """
+        for record, output_path, future in self._pending_probes:
+            duration, error = future.result()
+            if error is not None:
+                self.log_print(f"警告: 无法读取音频文件 {output_path} 的时长: {error}")
+            record['audio_duration'] = duration
+        self._pending_probes = []
+    
+    def process_lines_parallel(self, items):
+        """
+        多进程并行处理按行文本：各工作进程加载模型并报告就绪后，主进程按行序依次把任务派发给空闲进程，
+        并汇总处理记录
+        
+        模型加载不计入处理时间：所有工作进程就绪后才重新开始计时，与单进程模式（在 __init__ 中加载）一致
+        
+        参数:
+            items: (行号, 文本) 元组列表
+            
+        返回:
+            处理记录字典列表，顺序为完成顺序
+        """
+        import torch
+        import torch.multiprocessing as mp
+        
+        gpu_count = torch.cuda.device_count()
+        if 0 < gpu_count < self.num_workers:
+            # 每个进程加载一整套模型，同一块 GPU 上放多个实例容易在加载时显存不足
+            self.log_print(f"警告: 工作进程数 {self.num_workers} 超过可用 GPU 数 {gpu_count}，已限制为 {gpu_count}")
+            self.num_workers = gpu_count
+        self.log_print(f"并行工作进程数: {self.num_workers}，可用 GPU 数: {gpu_count}")
+        
+        mp_context = mp.get_context("spawn")
+        task_queues = [mp_context.Queue() for _ in range(self.num_workers)]
+        result_queue = mp_context.Queue()
+        context = mp.spawn(
+            _parallel_tts_worker,
+            args=(self.num_workers, gpu_count, self._model_kwargs, self.spk_audio_prompt, task_queues, result_queue),
+            nprocs=self.num_workers,
+            join=False
+        )
+        
+        def next_result():
+            # 等待工作进程的消息；有进程异常退出时 join 会抛出异常，全部正常退出仍无消息则返回 None
+            while True:
+                try:
+                    return result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if context.join(timeout=0):
+                        try:
+                            return result_queue.get_nowait()
+                        except queue.Empty:
+                            return None
+        
+        pending = list(reversed(items))
+        tasks = {}
+        
+        def dispatch(rank):
+            # 向空闲的工作进程派发下一行，没有剩余任务时通知其退出
+            if not pending:
+                task_queues[rank].put(None)
+                return
+            line_num, text = pending.pop()
+            output_filename, output_path = self.generate_output_filename(line_num, text, is_full_text=False)
+            
+            # 统计当前行的字符数量，并累计总字符数
+            char_count = self.count_chars(text)
+            self.total_char_count += char_count
+            tasks[line_num] = (char_count, output_filename, output_path)
+            
+            # 输出处理信息
+            self.log_print(f"正在处理第 {line_num} 行: {text[:50]}...字符数量: {char_count} 个")
+            self.log_print(f"输出文件: {output_filename}")
+            task_queues[rank].put((line_num, text, output_path))
+        
+        # 等待所有工作进程加载完模型
+        ready_ranks = []
+        while len(ready_ranks) < self.num_workers:
+            message = next_result()
+            if message is None:
+                break
+            _, rank, load_messages = message
+            for load_message in load_messages:
+                self.log_print(f"工作进程 {rank}: {load_message}")
+            ready_ranks.append(rank)
+        self.log_print("")
+        
+        # 模型加载完成后才开始计时
+        self.total_start_time = time.time()
+        for rank in ready_ranks:
+            dispatch(rank)
+        
+        records = []
+        while len(records) < len(items):
+            message = next_result()
+            if message is None:
+                break
+            _, rank, line_num, line_elapsed = message
+            char_count, output_filename, output_path = tasks[line_num]
+            
+            # 构建处理记录，音频时长待后台探测完成后回填
+            record = {
+                'line_num': line_num,
+                'char_count': char_count,
+                'elapsed_time': line_elapsed,
+                'audio_duration': 0.0
+            }
+            future = self._probe_pool.submit(self.probe_audio_duration, output_path)
+            self._pending_probes.append((record, output_path, future))
+            records.append(record)
+            
+            # 输出完成信息
+            self.log_print(f"已完成: {output_filename} 处理时间: {line_elapsed:.2f} 秒\n")
+            dispatch(rank)
+        
+        # 等待所有工作进程退出
+        while not context.join():
+            pass
+        
+        return records
     
     def process_full_text(self, text):
         """
@@ -217,7 +617,7 @@ class TTSBatchProcessor:
         output_filename, output_path = self.generate_output_filename(0, text, is_full_text=True)
         
         # 统计字符数量
-        char_count = len(text)
+        char_count = self.count_chars(text)
         self.total_char_count = char_count
         
         # 输出处理信息
@@ -277,6 +677,7 @@ class TTSBatchProcessor:
         self.log_print(f"所有音频文件生成完成！总字符数: {self.total_char_count} 个，总处理时间: {total_minutes} 分 {total_seconds} 秒")
         self.log_print(f"=== TTS 批量处理结束 === 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         self.log_print("")
+        self.flush_log()
     
     def generate_report(self, total_elapsed):
         """
@@ -297,12 +698,15 @@ class TTSBatchProcessor:
         total_width = (COL_WIDTH_LINE_NUM + COL_WIDTH_CHAR_COUNT + COL_WIDTH_AUDIO_TIME + 
                       COL_WIDTH_ELAPSED_TIME + COL_WIDTH_CHAR_RATIO + COL_WIDTH_TIME_RATIO)
         
-        # 输出报告标题
-        self.log_print("=" * total_width)
-        self.log_print("处理报告".center(total_width))
-        self.log_print("=" * total_width)
+        # 报告各行先收集到列表中，最后一次性拼接输出
+        rows = []
         
-        # 输出表头（使用统一的列宽度格式化）
+        # 报告标题
+        rows.append("=" * total_width)
+        rows.append("处理报告".center(total_width))
+        rows.append("=" * total_width)
+        
+        # 表头（使用统一的列宽度格式化）
         header_line = (
             f"{'行号':<{COL_WIDTH_LINE_NUM}}"
             f"{'字符数':<{COL_WIDTH_CHAR_COUNT}}"
@@ -311,10 +715,10 @@ class TTSBatchProcessor:
             f"{'字符比率':<{COL_WIDTH_CHAR_RATIO}}"
             f"{'时间比率':<{COL_WIDTH_TIME_RATIO}}"
         )
-        self.log_print(header_line)
-        self.log_print("-" * total_width)
+        rows.append(header_line)
+        rows.append("-" * total_width)
         
-        # 计算总音频时长并输出每行数据
+        # 计算总音频时长并格式化每行数据
         total_audio_duration = 0.0
         for record in self.processing_records:
             # 计算字符比率（消耗时间/字符数）
@@ -323,7 +727,7 @@ class TTSBatchProcessor:
             time_ratio = record['elapsed_time'] / record['audio_duration'] if record['audio_duration'] > 0 else 0.0
             # 累计总音频时长
             total_audio_duration += record['audio_duration']
-            # 输出单行记录（使用统一的列宽度格式化）
+            # 单行记录（使用统一的列宽度格式化）
             data_line = (
                 f"{record['line_num']:<{COL_WIDTH_LINE_NUM}}"
                 f"{record['char_count']:<{COL_WIDTH_CHAR_COUNT}}"
@@ -332,10 +736,10 @@ class TTSBatchProcessor:
                 f"{ratio:<{COL_WIDTH_CHAR_RATIO}.2f}"
                 f"{time_ratio:<{COL_WIDTH_TIME_RATIO}.2f}"
             )
-            self.log_print(data_line)
+            rows.append(data_line)
         
-        # 输出总计行
-        self.log_print("-" * total_width)
+        # 总计行
+        rows.append("-" * total_width)
         total_ratio = total_elapsed / self.total_char_count if self.total_char_count > 0 else 0.0
         total_time_ratio = total_elapsed / total_audio_duration if total_audio_duration > 0 else 0.0
         total_line = (
@@ -346,8 +750,12 @@ class TTSBatchProcessor:
             f"{total_ratio:<{COL_WIDTH_CHAR_RATIO}.2f}"
             f"{total_time_ratio:<{COL_WIDTH_TIME_RATIO}.2f}"
         )
-        self.log_print(total_line)
-        self.log_print("=" * total_width)
+        rows.append(total_line)
+        rows.append("=" * total_width)
+        
+        # 一次性输出整份报告
+        self.log_print("\n".join(rows))
+        self.flush_log()
     
     def process_batch(self):
         """
@@ -355,6 +763,7 @@ class TTSBatchProcessor:
         """
         # 记录总开始时间
         self.total_start_time = time.time()
+        self._batch_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # 输出日志头部信息
         self.print_log_header()
@@ -366,6 +775,7 @@ class TTSBatchProcessor:
             
             with open(self.input_file, 'r', encoding='utf-8') as f:
                 line_counter = 0
+                items = []
                 for line in f:
                     text = line.strip()
                     if not text:  # 跳过空行
@@ -374,26 +784,32 @@ class TTSBatchProcessor:
                     line_counter += 1
                     # 计算实际输出文件编号（从start_line_num开始）
                     output_line_num = self.start_line_num + (line_counter - 1)
-                    
+                    items.append((output_line_num, text))
+            
+            if self.num_workers > 1:
+                # 多进程并行处理，并保存处理记录
+                self.processing_records.extend(self.process_lines_parallel(items))
+            else:
+                for output_line_num, text in items:
                     # 处理单行文本
-                    record = self.process_single_line(output_line_num, text)
+                    record, output_path = self._synthesize_line(output_line_num, text)
+                    # 提交音频时长探测任务，不阻塞下一行推理，结果由 wait_pending_probes 回填
+                    future = self._probe_pool.submit(self.probe_audio_duration, output_path)
+                    self._pending_probes.append((record, output_path, future))
                     # 保存处理记录
                     self.processing_records.append(record)
+            
+            # 并行处理会打乱完成顺序，报告按原始行号输出
+            self.processing_records.sort(key=lambda record: record['line_num'])
         else:
             # 整文本读取模式：读取整个文件，忽略换行，生成一个音频文件
             self.log_print("处理模式: 整文本读取（生成一个完整音频文件）")
             self.log_print("")
             
             # 读取整个文件内容，忽略换行回车
+            # 一次读入，split() 在 C 层按换行回车等空白切分并丢弃空片段，再用空格连接
             with open(self.input_file, 'r', encoding='utf-8') as f:
-                lines = []
-                for line in f:
-                    stripped_line = line.strip()
-                    if stripped_line:  # 只添加非空行
-                        lines.append(stripped_line)
-                
-                # 将所有行合并成一个文本（用空格连接，也可以不用分隔符）
-                full_text = ' '.join(lines)
+                full_text = " ".join(f.read().split())
             
             if full_text:
                 # 处理整文本
@@ -403,6 +819,9 @@ class TTSBatchProcessor:
             else:
                 self.log_print("警告: 输入文件为空，无法生成音频文件")
         
+        # 回填后台探测的音频时长
+        self.wait_pending_probes()
+        
         # 计算总处理时间
         total_end_time = time.time()
         total_elapsed = total_end_time - self.total_start_time
@@ -430,20 +849,21 @@ def main():
     # 注意：仅在 read_by_line=True 时有效
     start_line_num = 1
     
-    # 创建 TTS 批量处理器实例
-    processor = TTSBatchProcessor(
+    # 创建 TTS 批量处理器实例（退出时自动关闭日志文件）
+    with TTSBatchProcessor(
         config_path="checkpoints/config.yaml",
         model_dir="checkpoints",
         spk_audio_prompt='examples/charlie_munger_voice_01.MP3',
-        use_fp16=False,
-        use_cuda_kernel=False,
-        use_deepspeed=False,
+        use_fp16=True,
+        use_cuda_kernel=True,
+        use_deepspeed=True,
+        use_accel=False,  # 已安装 flash_attn 时可设为 True，使用 CUDA Graph 加速解码
         start_line_num=start_line_num,
-        read_by_line=read_by_line
-    )
-    
-    # 执行批量处理
-    total_elapsed = processor.process_batch()
+        read_by_line=read_by_line,
+        num_workers=1  # 多 GPU 时可设为 GPU 数量，按行并行生成（仅在 read_by_line=True 时有效）
+    ) as processor:
+        # 执行批量处理
+        total_elapsed = processor.process_batch()
     
     # 返回总处理时间（可选，用于进一步处理）
     return total_elapsed